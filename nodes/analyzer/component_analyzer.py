@@ -16,6 +16,10 @@
 #
 # ##### END GPL LICENSE BLOCK #####
 
+from itertools import chain
+
+import numpy as np
+
 import bpy
 from bpy.props import BoolProperty, EnumProperty
 from sverchok.node_tree import SverchCustomTreeNode
@@ -57,6 +61,72 @@ op_dict = { #signature : (prop_name, e for enum and b for boolean)
     'a': ('output_numpy', 'b'),
     'v': ('vertex_normal_mode', 'e'),
 }
+# operators that calculate values per element (edge or face), so several objects
+# can be concatenated and processed in one call (used when output_numpy is on)
+batched_modes = {
+    'Edges': {'Direction', 'Length'},
+    'Faces': {'Center', 'Normal', 'Normal Absolute', 'Perimeter'},
+}
+
+enum_dicts = {
+    'Verts': vertex_modes_dict,
+    'Edges': edges_modes_dict,
+    'Faces': faces_modes_dict,
+    'Origin': pols_origin_modes_dict,
+    'Tangent': tangent_modes_dict,
+}
+# Enum items are built on first request. Blender needs the returned items to stay
+# referenced from python while they are in use, so they are kept here.
+enum_items_cache = {}
+
+def get_enum_items(key):
+    items = enum_items_cache.get(key)
+    if items is None:
+        if key == 'Center':
+            items = get_enum_items('Origin')[:3]
+        else:
+            modes_dict = enum_dicts[key]
+            # both (ident, ..., descr) mode tuples and (ident, func, descr) option tuples
+            items = [(k.replace(" ", "_"), k, v[-1], v[0]) for k, v in sorted(modes_dict.items(), key=lambda k: k[1][0])]
+        enum_items_cache[key] = items
+    return items
+
+
+def batched_mode(mode, component_mode, local_ops, sum_items):
+    """
+    Whether the mode function can be called once for all objects (see process_batched).
+    """
+    return component_mode in batched_modes.get(mode, set()) and not ('s' in local_ops and sum_items)
+
+def process_batched(func, params, special_op):
+    """
+    Process all objects with one call of func: objects are concatenated into one mesh
+    (with offsets applied to edges / faces indices) and the result is split back.
+    Returns None if objects can not be concatenated.
+    """
+    verts, indexes = params
+    count = min(len(verts), len(indexes))
+    if count == 0:
+        return []
+    try:
+        np_verts = [np.asarray(v) for v in verts[:count]]
+        np_indexes = [np.asarray(i) for i in indexes[:count]]
+    except ValueError:
+        # faces with different number of sides
+        return None
+    if any(v.ndim != 2 or len(v) == 0 for v in np_verts):
+        return None
+    if any(i.ndim != 2 or len(i) == 0 for i in np_indexes):
+        return None
+    if len({i.shape[1] for i in np_indexes}) > 1:
+        # objects with different number of sides per face
+        return None
+
+    offsets = np.cumsum([0] + [len(v) for v in np_verts[:-1]])
+    all_indexes = np.concatenate([i + offset for i, offset in zip(np_indexes, offsets)])
+    vals = func(np.concatenate(np_verts), all_indexes, *special_op)
+    splits = np.cumsum([len(i) for i in np_indexes[:-1]])
+    return np.split(vals, splits)
 
 
 class SvComponentAnalyzerNode(bpy.types.Node, SverchCustomTreeNode, SvRecursiveNode):
@@ -77,11 +147,23 @@ class SvComponentAnalyzerNode(bpy.types.Node, SverchCustomTreeNode, SvRecursiveN
         ('Faces', "Faces", "Faces Operators", 2)
     ]
 
-    edge_modes =        [(k.replace(" ", "_"), k, descr, ident) for k, (ident, _, _, _, _, _, _, descr) in sorted(edges_modes_dict.items(),  key=lambda k: k[1][0])]
-    vertex_modes =      [(k.replace(" ", "_"), k, descr, ident) for k, (ident, _, _, _, _, _, _, descr) in sorted(vertex_modes_dict.items(), key=lambda k: k[1][0])]
-    face_modes =        [(k.replace(" ", "_"), k, descr, ident) for k, (ident, _, _, _, _, _, _, descr) in sorted(faces_modes_dict.items(),  key=lambda k: k[1][0])]
-    pols_origin_modes = [(k.replace(" ", "_"), k, descr, ident) for k, (ident, _, descr) in sorted(pols_origin_modes_dict.items(), key=lambda k: k[1][0])]
-    tangent_modes =     [(k.replace(" ", "_"), k, descr, ident) for k, (ident, _, descr) in sorted(tangent_modes_dict.items(), key=lambda k: k[1][0])]
+    def vertex_modes(self, context):
+        return get_enum_items('Verts')
+
+    def edge_modes(self, context):
+        return get_enum_items('Edges')
+
+    def face_modes(self, context):
+        return get_enum_items('Faces')
+
+    def pols_origin_modes(self, context):
+        return get_enum_items('Origin')
+
+    def center_modes(self, context):
+        return get_enum_items('Center')
+
+    def tangent_modes(self, context):
+        return get_enum_items('Tangent')
 
     origin_modes = [
         ("Center", "Center", "Median Center", 0),
@@ -108,6 +190,9 @@ class SvComponentAnalyzerNode(bpy.types.Node, SverchCustomTreeNode, SvRecursiveN
         ('MWS', 'Mean Weighted by Sine', '', 4)
     ]
 
+    # options passed to mode function, per node_id: (option values, options); see get_special_op
+    special_op_cache = {}
+
     @throttle_and_update_node
     def update_mode(self, context):
         # for mode in self.modes:
@@ -140,19 +225,19 @@ class SvComponentAnalyzerNode(bpy.types.Node, SverchCustomTreeNode, SvRecursiveN
     vertex_mode: EnumProperty(
         name="Operator",
         items=vertex_modes,
-        default="Normal",
+        default=0, # Normal
         update=update_mode)
 
     edge_mode: EnumProperty(
         name="Operator",
         items=edge_modes,
-        default="Length",
+        default=20, # Length
         update=update_mode)
 
     face_mode: EnumProperty(
         name="Operator",
         items=face_modes,
-        default="Normal",
+        default=20, # Normal
         update=update_mode)
 
     flat_output: BoolProperty(
@@ -186,19 +271,19 @@ class SvComponentAnalyzerNode(bpy.types.Node, SverchCustomTreeNode, SvRecursiveN
     tangent_mode: EnumProperty(
         name="Direction",
         items=tangent_modes,
-        default="Edge",
+        default=1, # Edge
         update=update_mode)
 
     center_mode: EnumProperty(
         name="Center",
-        items=pols_origin_modes[:3],
-        default="Median_Center",
+        items=center_modes,
+        default=31, # Median Center
         update=update_mode)
 
     pols_origin_mode: EnumProperty(
         name="Origin",
         items=pols_origin_modes,
-        default="Median_Center",
+        default=31, # Median Center
         update=update_mode)
 
     vertex_normal_mode: EnumProperty(
@@ -317,21 +402,23 @@ class SvComponentAnalyzerNode(bpy.types.Node, SverchCustomTreeNode, SvRecursiveN
     def post_process(self, result_vals, unwrap):
         if unwrap:
             if not self.wrap:
-                return [v for r in result_vals for v in r]
+                return self.join_vals(result_vals)
         else:
             if self.split:
-                return [[v] for r in result_vals for v in r]
+                vals = self.join_vals(result_vals)
+                if isinstance(vals, np.ndarray):
+                    return vals[:, np.newaxis]
+                return [[v] for v in vals]
         return result_vals
 
+    def join_vals(self, result_vals):
+        if self.output_numpy and result_vals and all(isinstance(r, np.ndarray) for r in result_vals):
+            return np.concatenate(result_vals)
+        return list(chain.from_iterable(result_vals))
+
     def output(self, result_vals, socket, unwrap):
-        if unwrap:
-            if not self.wrap:
-                result_vals = [v for r in result_vals for v in r]
-        else:
-            if self.split:
-                result_vals = [[v] for r in result_vals for v in r]
+        socket.sv_set(self.post_process(result_vals, unwrap))
 
-        socket.sv_set(result_vals)
     def pre_setup(self):
         for s in self.inputs:
             s.nesting_level = 3
@@ -346,25 +433,14 @@ class SvComponentAnalyzerNode(bpy.types.Node, SverchCustomTreeNode, SvRecursiveN
         if "p" in func_inputs:
             self.inputs[2].is_mandatory = True
 
-    def process_data(self, params):
-        verts, edges, pols = params
-
-        modes_dict = modes_dicts[self.mode]
-        component_mode = self.actual_mode().replace("_", " ")
-        func_inputs, local_ops, output_ops, func, output_sockets = modes_dict[component_mode][1:6]
-        params = []
-        if "v" in func_inputs:
-            params.append(verts)
-        if "e" in func_inputs:
-            params.append(edges)
-        if "p" in func_inputs:
-            params.append(pols)
-
-        result_vals = []
-
-
-        special = False
-        if local_ops:
+    def get_special_op(self, component_mode, local_ops):
+        # Properties can be changed without update callbacks (animation, drivers, undo),
+        # so cached options are used only if the values they were made of are the same.
+        values = tuple(component_mode if option == 'b' else getattr(self, op_dict[option][0]) for option in local_ops)
+        cached = self.special_op_cache.get(self.node_id)
+        if cached is not None and cached[0] == values:
+            special_op = cached[1]
+        else:
             options_dict = {
                 'b': component_mode,
                 'c': self.center_mode,
@@ -382,15 +458,44 @@ class SvComponentAnalyzerNode(bpy.types.Node, SverchCustomTreeNode, SvRecursiveN
             for option in local_ops:
                 option_val = options_dict[option]
                 special_op.append(option_val if type(option_val) == bool else option_val.replace("_", " "))
-            special = True
+            self.special_op_cache[self.node_id] = (values, special_op)
+        return special_op
+
+    def sv_free(self):
+        self.special_op_cache.pop(self.node_id, None)
+
+    def process_data(self, params):
+        verts, edges, pols = params
 
-        for param in zip(*params):
-            if special:
-                vals = func(*param, *special_op)
-            else:
-                vals = func(*param)
+        modes_dict = modes_dicts[self.mode]
+        component_mode = self.actual_mode().replace("_", " ")
+        func_inputs, local_ops, output_ops, func, output_sockets = modes_dict[component_mode][1:6]
+        params = []
+        if "v" in func_inputs:
+            params.append(verts)
+        if "e" in func_inputs:
+            params.append(edges)
+        if "p" in func_inputs:
+            params.append(pols)
+
+        result_vals = None
+
+        special = bool(local_ops)
+        if special:
+            special_op = self.get_special_op(component_mode, local_ops)
+
+        if special and self.output_numpy and batched_mode(self.mode, component_mode, local_ops, self.sum_items):
+            result_vals = process_batched(func, params, special_op)
+
+        if result_vals is None:
+            result_vals = []
+            for param in zip(*params):
+                if special:
+                    vals = func(*param, *special_op)
+                else:
+                    vals = func(*param)
 
-            result_vals.append(vals)
+                result_vals.append(vals)
         unwrap = 'u' in output_ops
         if len(output_sockets) == 1:
             return self.post_process(result_vals, unwrap), [], []
@@ -0,0 +1,68 @@
+from sverchok.utils.testing import SverchokTestCase
+from sverchok.nodes.analyzer.component_analyzer import process_batched, batched_mode
+from sverchok.utils.modules.edge_utils import edges_length, edges_direction
+from sverchok.utils.modules.polygon_utils import pols_center, pols_normals, pols_perimeters
+
+class ComponentAnalyzerBatchTests(SverchokTestCase):
+    def setUp(self):
+        super().setUp()
+        self.verts = [
+                [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0), (0, 0, 1), (1, 0, 1), (1, 1, 1), (0, 1, 1)],
+                [(0, 0, 0), (2, 0, 0), (2, 3, 1), (0, 3, 1)]
+            ]
+        self.edges = [
+                [(0, 1), (1, 2), (2, 3), (3, 0), (4, 5), (5, 6), (1, 5)],
+                [(0, 1), (1, 2), (2, 3)]
+            ]
+        self.quads = [
+                [(0, 1, 2, 3), (4, 5, 6, 7), (0, 1, 5, 4)],
+                [(0, 1, 2, 3)]
+            ]
+        self.tris = [
+                [(0, 1, 2), (4, 5, 6)],
+                [(0, 1, 2), (0, 2, 3)]
+            ]
+
+    def assert_batched_equals_loop(self, func, indexes, special_op):
+        expected = [func(v, i, *special_op) for v, i in zip(self.verts, indexes)]
+        result = process_batched(func, [self.verts, indexes], special_op)
+        self.assertEqual(len(result), len(expected))
+        for vals, expected_vals in zip(result, expected):
+            self.assert_numpy_arrays_equal(vals, expected_vals, precision=8)
+
+    def test_edges_length(self):
+        self.assert_batched_equals_loop(edges_length, self.edges, [False, True])
+
+    def test_edges_direction(self):
+        self.assert_batched_equals_loop(edges_direction, self.edges, [True])
+
+    def test_pols_center(self):
+        for origin in ['Bounds Center', 'Median Center', 'Median Weighted Center']:
+            with self.subTest(origin=origin):
+                self.assert_batched_equals_loop(pols_center, self.quads, [origin, True])
+
+    def test_pols_normals(self):
+        self.assert_batched_equals_loop(pols_normals, self.quads, [True])
+        self.assert_batched_equals_loop(pols_normals, self.tris, [True])
+
+    def test_pols_perimeters(self):
+        self.assert_batched_equals_loop(pols_perimeters, self.quads, [False, True])
+
+    def test_no_objects(self):
+        self.assertEqual(process_batched(pols_normals, [[], []], [True]), [])
+
+    def test_mixed_face_sizes(self):
+        faces = [self.quads[0], self.tris[1]]
+        self.assertIsNone(process_batched(pols_normals, [self.verts, faces], [True]))
+        faces = [self.quads[0] + self.tris[0], self.quads[1]]
+        self.assertIsNone(process_batched(pols_normals, [self.verts, faces], [True]))
+
+    def test_empty_edges(self):
+        edges = [self.edges[0], []]
+        self.assertIsNone(process_batched(edges_length, [self.verts, edges], [False, True]))
+
+    def test_sum(self):
+        self.assertTrue(batched_mode('Edges', 'Length', 'sa', False))
+        self.assertFalse(batched_mode('Edges', 'Length', 'sa', True))
+        self.assertFalse(batched_mode('Faces', 'Perimeter', 'sa', True))
+        self.assertFalse(batched_mode('Edges', 'Matrix', 'omu', False))
@@ -10,10 +10,11 @@ from sverchok.utils.curve import knotvector as sv_knotvector
 from sverchok.utils.curve.primitives import SvCircle
 from sverchok.utils.curve.nurbs import SvGeomdlCurve, SvNativeNurbsCurve, SvNurbsBasisFunctions, SvNurbsCurve
 from sverchok.utils.curve.nurbs_algorithms import interpolate_nurbs_curve
+from sverchok.utils import nurbs_common
 from sverchok.utils.nurbs_common import elevate_bezier_degree, from_homogenous
 from sverchok.utils.surface.nurbs import SvGeomdlSurface, SvNativeNurbsSurface
 from sverchok.utils.surface.algorithms import SvCurveLerpSurface
-from sverchok.dependencies import geomdl
+from sverchok.dependencies import geomdl, numba
 
 if geomdl is not None:
     from geomdl.helpers import basis_function_one, basis_function_ders_one
@@ -61,6 +62,85 @@ class NurbsCurveTests(SverchokTestCase):
 
         self.assert_numpy_arrays_equal(expected, d2s, precision=8)
 
+    @requires(geomdl)
+    def test_basis_evaluate_all(self):
+        "Test all basis functions derivatives at once"
+        knotvector = [0, 0, 0, 0.3, 0.5, 0.5, 1, 1, 1]
+        degree = 2
+        ts = np.linspace(0, 1.0, num=20, endpoint=False)
+        functions = SvNurbsBasisFunctions(knotvector)
+        for order in range(degree+1):
+            expected = np.array([[basis_function_ders_one(degree, knotvector, i, t, order)[order] for t in ts] for i in range(6)])
+            ns = functions.evaluate_all(degree, ts, order)
+            self.assert_numpy_arrays_equal(ns, expected, precision=8)
+
+    def check_deboor_kernel(self, kernel, degrees):
+        "Compare Numba de Boor kernel with numpy implementation"
+        knotvectors = [
+                [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+                [0, 0, 0, 0, 0.2, 0.5, 0.5, 0.5, 1, 1, 1, 1],
+                [0, 0, 0.3, 0.3, 0.3, 0.6, 1, 1.5, 1.5]
+            ]
+        for knotvector in knotvectors:
+            functions = SvNurbsBasisFunctions(knotvector)
+            ts = np.concatenate((np.linspace(knotvector[0] - 0.5, knotvector[-1] + 0.5, num=37), np.unique(knotvector)))
+            for degree in degrees:
+                padded, first_span, last_span, _ = functions._get_tables(degree)
+                for deriv_order in range(degree+2):
+                    with self.subTest(knotvector=knotvector, degree=degree, deriv_order=deriv_order):
+                        expected, expected_span = functions._deboor(degree, ts, deriv_order)
+                        ders = np.empty((deriv_order+1, len(ts), degree+1))
+                        span = np.empty((len(ts),), dtype=np.int64)
+                        kernel(padded, first_span, last_span, degree, ts, deriv_order, ders, span)
+                        self.assert_numpy_arrays_equal(span, expected_span)
+                        self.assert_numpy_arrays_equal(ders, expected, precision=6)
+
+    @requires(numba)
+    def test_deboor_general_kernel(self):
+        "Test Numba de Boor kernel against numpy implementation"
+        self.check_deboor_kernel(nurbs_common._deboor_general, [1, 2, 3, 4])
+
+    @requires(numba)
+    def test_deboor_specialized_kernels(self):
+        "Test Numba de Boor kernels for degrees 2 and 3 against numpy implementation"
+        for degree in [2, 3]:
+            kernel = nurbs_common.get_deboor_kernel(degree)
+            self.assertIsNot(kernel, nurbs_common._deboor_general)
+            self.check_deboor_kernel(kernel, [degree])
+
+    @requires(geomdl)
+    def test_basis_precompute(self):
+        "Test table of basis functions derivatives"
+        knotvector = [0, 0, 0, 0.3, 0.5, 0.5, 1, 1, 1]
+        degree = 2
+        ts = np.linspace(0, 1.0, num=20, endpoint=False)
+        functions = SvNurbsBasisFunctions(knotvector)
+        table = functions.precompute(degree, 2, ts)
+        self.assertEqual(table.shape, (3, 6, 20))
+        expected = np.array([[basis_function_ders_one(degree, knotvector, i, t, 2) for t in ts] for i in range(6)]) # (6, 20, 3)
+        expected = np.transpose(expected, axes=(2,0,1)) # (3, 6, 20)
+        self.assert_numpy_arrays_equal(table, expected, precision=8)
+        # the last table is remembered
+        self.assertIs(functions.precompute(degree, 2, ts), table)
+
+    @requires(geomdl)
+    def test_geomdl_build_copies_input(self):
+        control_points = np.array(self.control_points)
+        curve = SvGeomdlCurve.build_geomdl(self.degree, self.knotvector, control_points, self.weights)
+        control_points[0] = [100, 100, 100]
+        expected = np.array(self.control_points)
+        self.assert_numpy_arrays_equal(curve.get_control_points(), expected, precision=8)
+        self.assert_numpy_arrays_equal(curve.evaluate(0.0), expected[0], precision=8)
+
+    @requires(geomdl)
+    def test_geomdl_build_checks_input(self):
+        with self.assertRaisesRegex(Exception, "Knot vector has invalid length"):
+            SvGeomdlCurve.build_geomdl(self.degree, self.knotvector[1:], self.control_points, self.weights)
+        with self.assertRaisesRegex(Exception, "Shape of weights"):
+            SvGeomdlCurve.build_geomdl(self.degree, self.knotvector, self.control_points, self.weights[1:])
+        with self.assertRaisesRegex(Exception, "needs at least"):
+            SvGeomdlCurve.build_geomdl(self.degree, [0, 0, 0, 1, 1, 1], self.control_points[:2])
+
     #@unittest.skip
     @requires(geomdl)
     def test_curve_eval(self):
@@ -148,7 +228,8 @@ class NurbsCurveTests(SverchokTestCase):
         geomdl_curve = SvNurbsCurve.build('GEOMDL', degree, knotvector, points, weights)
         native_curve = SvNurbsCurve.build('NATIVE', degree, knotvector, points, weights)
         p1s = geomdl_curve.evaluate_array(ts)
-        p2s = native_curve.evaluate_array(ts)
+        # Geomdl implementation clamps ts into curve bounds (without modifying ts)
+        p2s = native_curve.evaluate_array(np.clip(ts, 0, 1))
         #print("NATIVE:", p2s)
         self.assert_numpy_arrays_equal(p1s, p2s, precision=8)
 
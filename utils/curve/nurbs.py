@@ -11,6 +11,7 @@ from math import pi
 import traceback
 
 from sverchok.utils.logging import info
+from sverchok.utils.math import binomial
 from sverchok.utils.curve.core import SvCurve, UnsupportedCurveTypeException
 from sverchok.utils.curve.bezier import SvBezierCurve
 from sverchok.utils.curve import knotvector as sv_knotvector
@@ -92,7 +93,7 @@ class SvNurbsCurve(SvCurve):
         tknots = [Spline.create_knots(points[i], metric=metric) for i in range(n_curves)]
         knotvectors = [sv_knotvector.from_tknots(degree, tknots[i]) for i in range(n_curves)]
         functions = [SvNurbsBasisFunctions(knotvectors[i]) for i in range(n_curves)]
-        coeffs_by_row = [[functions[curve_idx].function(idx, degree)(tknots[curve_idx]) for idx in range(n_points)] for curve_idx in range(n_curves)]
+        coeffs_by_row = [functions[curve_idx].precompute(degree, 0, tknots[curve_idx])[0] for curve_idx in range(n_curves)]
         coeffs_by_row = np.array(coeffs_by_row)
         A = np.zeros((n_curves, 3*n_points, 3*n_points))
         for curve_idx in range(n_curves):
@@ -559,33 +560,73 @@ class SvGeomdlCurve(SvNurbsCurve):
     """
     geomdl-based implementation of NURBS curves
     """
-    def __init__(self, curve):
-        self.curve = curve
+    def __init__(self, curve=None):
+        self._curve = curve
+        # (degree, knotvector, control_points, weights) as numpy arrays,
+        # when the geomdl curve object is not built yet
+        self._params = None
         self.u_bounds = (0.0, 1.0)
-        self.__description__ = f"Geomdl NURBS (degree={curve.degree}, pts={len(curve.ctrlpts)})"
+        if curve is not None:
+            self.__description__ = f"Geomdl NURBS (degree={curve.degree}, pts={len(curve.ctrlpts)})"
 
-    @classmethod
-    def build_geomdl(cls, degree, knotvector, control_points, weights=None, normalize_knots=False):
+    @property
+    def curve(self):
+        """
+        geomdl curve object. When the curve was created by build_geomdl(),
+        it is built on first access only.
+        """
+        if self._curve is None:
+            self._curve = SvGeomdlCurve._build_curve(*self._params)
+        return self._curve
+
+    @staticmethod
+    def _build_curve(degree, knotvector, control_points, weights=None, normalize_knots=False):
         if weights is not None:
             curve = NURBS.Curve(normalize_kv = normalize_knots)
         else:
             curve = BSpline.Curve(normalize_kv = normalize_knots)
+        curve.degree = degree
+        # geomdl works with lists
+        curve.ctrlpts = control_points.tolist() if hasattr(control_points, 'tolist') else list(control_points)
+        if weights is not None:
+            curve.weights = weights.tolist() if hasattr(weights, 'tolist') else list(weights)
+        curve.knotvector = knotvector.tolist() if hasattr(knotvector, 'tolist') else list(knotvector)
+        return curve
+
+    @classmethod
+    def build_geomdl(cls, degree, knotvector, control_points, weights=None, normalize_knots=False):
         if degree == 0:
             raise Exception("Zero degree!?")
-        curve.degree = degree
-        if isinstance(control_points, np.ndarray):
-            control_points = control_points.tolist()
-        curve.ctrlpts = control_points
+        if normalize_knots:
+            # let geomdl normalize the knotvector
+            curve = SvGeomdlCurve._build_curve(degree, knotvector, control_points, weights, normalize_knots)
+            result = SvGeomdlCurve(curve)
+            result.u_bounds = curve.knotvector[0], curve.knotvector[-1]
+            return result
+
+        # copy inputs, so that later changes of caller's arrays do not affect the curve
+        knotvector = np.array(knotvector, dtype=np.float64)
+        control_points = np.array(control_points, dtype=np.float64)
         if weights is not None:
-            if isinstance(weights, np.ndarray):
-                weights = weights.tolist()
-            curve.weights = weights
-        if isinstance(knotvector, np.ndarray):
-            knotvector = knotvector.tolist()
-        curve.knotvector = knotvector
+            weights = np.array(weights, dtype=np.float64)
+
+        # geomdl curve is built later, so check the input here,
+        # in order to raise errors when the curve is created
+        n = len(control_points)
+        if control_points.ndim != 2:
+            raise Exception(f"Array of points was expected, but got {control_points.shape}")
+        if n < degree + 1:
+            raise Exception(f"Curve of degree {degree} needs at least {degree+1} control points, but got {n}")
+        if weights is not None and weights.shape != (n,):
+            raise Exception(f"Shape of weights {weights.shape} does not match number of control points ({n})")
+        kv_error = sv_knotvector.check(degree, knotvector, n)
+        if kv_error is not None:
+            raise Exception(kv_error)
 
-        result = SvGeomdlCurve(curve)
-        result.u_bounds = curve.knotvector[0], curve.knotvector[-1]
+        result = SvGeomdlCurve()
+        result._params = (degree, knotvector, control_points, weights)
+        result.u_bounds = float(knotvector[0]), float(knotvector[-1])
+        result.__description__ = f"Geomdl NURBS (degree={degree}, pts={len(control_points)})"
         return result
 
     @classmethod
@@ -627,15 +668,27 @@ class SvGeomdlCurve(SvNurbsCurve):
         return SvNurbsCurve.GEOMDL
 
     def is_rational(self, tolerance=1e-4):
+        if self._params is not None:
+            weights = self._params[3]
+            if weights is None:
+                return False
+            return (weights.max() - weights.min()) > tolerance
         if self.curve.weights is None:
             return False
         w, W = min(self.curve.weights), max(self.curve.weights)
         return (W - w) > tolerance
 
     def get_control_points(self):
+        if self._params is not None:
+            return self._params[2]
         return np.array(self.curve.ctrlpts)
 
     def get_weights(self):
+        if self._params is not None:
+            weights = self._params[3]
+            if weights is not None:
+                return weights
+            return np.ones((len(self._params[2]),))
         if self.curve.weights is not None:
             return np.array(self.curve.weights)
         else:
@@ -643,9 +696,13 @@ class SvGeomdlCurve(SvNurbsCurve):
             return np.ones((k,))
 
     def get_knotvector(self):
+        if self._params is not None:
+            return self._params[1]
         return np.array(self.curve.knotvector)
 
     def get_degree(self):
+        if self._params is not None:
+            return self._params[0]
         return self.curve.degree
 
     def evaluate(self, t):
@@ -654,8 +711,8 @@ class SvGeomdlCurve(SvNurbsCurve):
 
     def evaluate_array(self, ts):
         t_min, t_max = self.get_u_bounds()
-        ts[ts < t_min] = t_min
-        ts[ts > t_max] = t_max
+        # clip rather than assign, so that the caller's ts is not modified
+        ts = np.clip(ts, t_min, t_max)
         vs = self.curve.evaluate_list(list(ts))
         return np.array(vs)
 
@@ -665,8 +722,7 @@ class SvGeomdlCurve(SvNurbsCurve):
 
     def tangent_array(self, ts):
         t_min, t_max = self.get_u_bounds()
-        ts[ts < t_min] = t_min
-        ts[ts > t_max] = t_max
+        ts = np.clip(ts, t_min, t_max)
         vs = operations.tangent(self.curve, list(ts), normalize=False)
         tangents = [t[1] for t in vs]
         #print(f"ts: {ts}, vs: {tangents}")
@@ -677,22 +733,19 @@ class SvGeomdlCurve(SvNurbsCurve):
         return np.array(second)
 
     def second_derivative_array(self, ts):
-        return np.vectorize(self.second_derivative, signature='()->(3)')(ts)
+        return self.derivatives_array(2, ts)[1]
 
     def third_derivative(self, t):
         p, first, second, third = self.curve.derivatives(t, order=3)
         return np.array(third)
 
     def third_derivative_array(self, ts):
-        return np.vectorize(self.third_derivative, signature='()->(3)')(ts)
+        return self.derivatives_array(3, ts)[2]
 
     def derivatives_array(self, n, ts):
-        def derivatives(t):
-            result = self.curve.derivatives(t, order=n)
-            return np.array(result[1:])
-        result = np.vectorize(derivatives, signature='()->(n,3)')(ts)
-        result = np.transpose(result, axes=(1, 0, 2))
-        return result
+        result = [self.curve.derivatives(float(t), order=n) for t in ts]
+        result = np.array(result)[:, 1:, :] # (len(ts), n, 3)
+        return np.transpose(result, axes=(1, 0, 2))
 
     def get_u_bounds(self):
         return self.u_bounds
@@ -701,10 +754,11 @@ class SvGeomdlCurve(SvNurbsCurve):
         vector = np.array(vector)
         my_control_points = self.get_control_points()
         my_weights = self.get_weights()
-        other_control_points = my_control_points + vector
-        control_points = np.stack((my_control_points, other_control_points))
-        control_points = np.transpose(control_points, axes=(1,0,2)).tolist()
-        weights = np.stack((my_weights, my_weights)).T.tolist()
+        k = len(my_control_points)
+        control_points = np.empty((k, 2, 3))
+        control_points[:,0,:] = my_control_points
+        control_points[:,1,:] = my_control_points + vector
+        weights = np.repeat(my_weights[:,np.newaxis], 2, axis=1)
         my_knotvector = self.get_knotvector()
         my_degree = self.get_degree()
         knotvector_v = sv_knotvector.generate(1, 2, clamped=True)
@@ -754,11 +808,21 @@ class SvNativeNurbsCurve(SvNurbsCurve):
             self.weights = np.array(weights) # (k, )
         else:
             self.weights = np.ones((k,))
+        # Weighted control points (w*x, w*y, w*z) and weights, stored per axis;
+        # used for evaluation, so that weights are not multiplied on each call.
+        self._weighted_soa = np.vstack((self.control_points.T * self.weights, self.weights)) # (4, k)
+        # Non-rational curve: all denominators are sums of basis functions.
+        self._unit_weights = weights is None or bool((self.weights == 1.0).all())
         self.knotvector = np.array(knotvector)
         if normalize_knots:
             self.knotvector = sv_knotvector.normalize(self.knotvector)
         self.degree = degree
-        self.basis = SvNurbsBasisFunctions(knotvector)
+        # Non-rational curve with clamped knotvector: basis functions sum up to 1
+        # everywhere within curve domain, so there is nothing to divide by.
+        self._is_bspline = (self._unit_weights
+                and self.knotvector[0] == self.knotvector[degree]
+                and self.knotvector[-1] == self.knotvector[-degree-1])
+        self.basis = SvNurbsBasisFunctions.get(self.knotvector, degree)
         self.tangent_delta = 0.001
         self.u_bounds = None # take from knotvector
         self.__description__ = f"Native NURBS (degree={degree}, pts={k})"
@@ -768,6 +832,8 @@ class SvNativeNurbsCurve(SvNurbsCurve):
         return SvNativeNurbsCurve(degree, knotvector, control_points, weights, normalize_knots)
 
     def is_rational(self, tolerance=1e-6):
+        if self._unit_weights:
+            return False
         w, W = self.weights.min(), self.weights.max()
         return (W - w) > tolerance
 
@@ -792,33 +858,64 @@ class SvNativeNurbsCurve(SvNurbsCurve):
             return numerator / denominator
 
     def fraction(self, deriv_order, ts):
-        n = len(ts)
         p = self.degree
         k = len(self.control_points)
-        ns = np.array([self.basis.derivative(i, p, deriv_order)(ts) for i in range(k)]) # (k, n)
-        coeffs = ns * self.weights[np.newaxis].T # (k, n)
-        coeffs_t = coeffs[np.newaxis].T # (n, k, 1)
-        numerator = (coeffs_t * self.control_points) # (n, k, 3)
-        numerator = numerator.sum(axis=1) # (n, 3)
-        denominator = coeffs.sum(axis=0) # (n,)
+        ns, span = self.basis.evaluate_all_local(p, ts, deriv_order) # (n, p+1), (n,)
+        idxs = np.clip(span[np.newaxis].T + np.arange(-p, 1), 0, k-1) # (n, p+1)
+        numerator, denominator = self._weighted_sum(ns, idxs) # (n, 3), (n,)
 
         return numerator, denominator[np.newaxis].T
 
+    def fraction_all(self, max_order, ts):
+        """
+        Calculate numerators and denominators of the curve and its derivatives
+        of orders 1..max_order in one pass.
+
+        Returns: tuple:
+            * numerators: np.array of shape (max_order+1, n, 3);
+            * denominators: np.array of shape (max_order+1, n, 1).
+        """
+        p = self.degree
+        k = len(self.control_points)
+        ns, span = self.basis.derivatives_all_local(p, ts, max_order) # (max_order+1, n, p+1), (n,)
+        idxs = np.clip(span[np.newaxis].T + np.arange(-p, 1), 0, k-1) # (n, p+1)
+        numerators, denominators = self._weighted_sum(ns, idxs) # (max_order+1, n, 3), (max_order+1, n)
+
+        return numerators, denominators[:, :, np.newaxis]
+
+    def _weighted_sum(self, ns, idxs):
+        """
+        Sum weighted control points and weights with basis function values ns
+        of shape (..., n, p+1), for control points indicated by idxs of shape (n, p+1).
+
+        Returns: tuple:
+            * numerators: np.array of shape (..., n, 3);
+            * denominators: np.array of shape (..., n).
+        """
+        if self._unit_weights:
+            numerators = np.einsum('...np,dnp->...nd', ns, self._weighted_soa[:3, idxs])
+            denominators = ns.sum(axis=-1)
+        else:
+            fractions = np.einsum('...np,dnp->...nd', ns, self._weighted_soa[:, idxs])
+            numerators, denominators = fractions[..., :3], fractions[..., 3]
+        return numerators, denominators
+
     def fraction_single(self, deriv_order, t):
         p = self.degree
         k = len(self.control_points)
         ts = np.array([t])
-        ns = np.array([self.basis.derivative(i, p, deriv_order)(ts)[0] for i in range(k)]) # (k,)
-        coeffs = ns * self.weights # (k, )
-        coeffs_t = coeffs[np.newaxis].T
-        numerator = (coeffs_t * self.control_points) # (k, 3)
-        numerator = numerator.sum(axis=0) # (3,)
-        denominator = coeffs.sum(axis=0) # ()
+        ns, span = self.basis.evaluate_all_local(p, ts, deriv_order) # (1, p+1), (1,)
+        idxs = np.clip(span[0] + np.arange(-p, 1), 0, k-1) # (p+1,)
+        fraction = self._weighted_soa[:, idxs] @ ns[0] # (4,)
+        numerator = fraction[:3] # (3,)
+        denominator = fraction[3] # ()
 
         return numerator, denominator
 
     def evaluate_array(self, ts):
         numerator, denominator = self.fraction(0, ts)
+        if self._is_bspline:
+            return numerator
 #         if (denominator == 0).any():
 #             print("Num:", numerator)
 #             print("Denom:", denominator)
@@ -828,64 +925,36 @@ class SvNativeNurbsCurve(SvNurbsCurve):
         return self.tangent_array(np.array([t]))[0]
 
     def tangent_array(self, ts):
-        # curve = numerator / denominator
-        # ergo:
-        # numerator = curve * denominator
-        # ergo:
-        # numerator' = curve' * denominator + curve * denominator'
-        # ergo:
-        # curve' = (numerator' - curve*denominator') / denominator
-        numerator, denominator = self.fraction(0, ts)
-        curve = numerator / denominator
-        numerator1, denominator1 = self.fraction(1, ts)
-        curve1 = (numerator1 - curve*denominator1) / denominator
-        return curve1
+        return self.derivatives_array(1, ts)[0]
 
     def second_derivative(self, t):
         return self.second_derivative_array(np.array([t]))[0]
 
     def second_derivative_array(self, ts):
-        # numerator'' = (curve * denominator)'' =
-        #  = curve'' * denominator + 2 * curve' * denominator' + curve * denominator''
-        numerator, denominator = self.fraction(0, ts)
-        curve = numerator / denominator
-        numerator1, denominator1 = self.fraction(1, ts)
-        curve1 = (numerator1 - curve*denominator1) / denominator
-        numerator2, denominator2 = self.fraction(2, ts)
-        curve2 = (numerator2 - 2*curve1*denominator1 - curve*denominator2) / denominator
-        return curve2
+        return self.derivatives_array(2, ts)[1]
 
     def third_derivative_array(self, ts):
-        # numerator''' = (curve * denominator)''' = 
-        #  = curve''' * denominator + 3 * curve'' * denominator' + 3 * curve' * denominator'' + denominator'''
-        numerator, denominator = self.fraction(0, ts)
-        curve = numerator / denominator
-        numerator1, denominator1 = self.fraction(1, ts)
-        curve1 = (numerator1 - curve*denominator1) / denominator
-        numerator2, denominator2 = self.fraction(2, ts)
-        curve2 = (numerator2 - 2*curve1*denominator1 - curve*denominator2) / denominator
-        numerator3, denominator3 = self.fraction(3, ts)
-
-        curve3 = (numerator3 - 3*curve2*denominator1 - 3*curve1*denominator2 - curve*denominator3) / denominator
-        return curve3
+        return self.derivatives_array(3, ts)[2]
 
     def derivatives_array(self, n, ts):
-        result = []
-        if n >= 1:
-            numerator, denominator = self.fraction(0, ts)
-            curve = numerator / denominator
-            numerator1, denominator1 = self.fraction(1, ts)
-            curve1 = (numerator1 - curve*denominator1) / denominator
-            result.append(curve1)
-        if n >= 2:
-            numerator2, denominator2 = self.fraction(2, ts)
-            curve2 = (numerator2 - 2*curve1*denominator1 - curve*denominator2) / denominator
-            result.append(curve2)
-        if n >= 3:
-            numerator3, denominator3 = self.fraction(3, ts)
-            curve3 = (numerator3 - 3*curve2*denominator1 - 3*curve1*denominator2 - curve*denominator3) / denominator
-            result.append(curve3)
-        return result
+        # curve = numerator / denominator
+        # ergo:
+        # numerator = curve * denominator
+        # ergo, by Leibniz rule:
+        # numerator^(m) = sum_{j=0}^{m} binomial(m, j) * curve^(j) * denominator^(m-j)
+        # ergo:
+        # curve^(m) = (numerator^(m) - sum_{j=0}^{m-1} binomial(m, j) * curve^(j) * denominator^(m-j)) / denominator
+        numerators, denominators = self.fraction_all(n, ts)
+        if self._is_bspline:
+            return list(numerators[1:])
+        denominator = denominators[0]
+        curves = [numerators[0] / denominator]
+        for m in range(1, n+1):
+            numerator = numerators[m]
+            for j in range(m):
+                numerator = numerator - binomial(m, j) * curves[j] * denominators[m-j]
+            curves.append(numerator / denominator)
+        return curves[1:]
 
     def get_u_bounds(self):
         if self.u_bounds is None:
@@ -897,10 +966,11 @@ class SvNativeNurbsCurve(SvNurbsCurve):
 
     def extrude_along_vector(self, vector):
         vector = np.array(vector)
-        other_control_points = self.control_points + vector
-        control_points = np.stack((self.control_points, other_control_points))
-        control_points = np.transpose(control_points, axes=(1,0,2))
-        weights = np.stack((self.weights, self.weights)).T
+        k = len(self.control_points)
+        control_points = np.empty((k, 2, 3))
+        control_points[:,0,:] = self.control_points
+        control_points[:,1,:] = self.control_points + vector
+        weights = np.repeat(self.weights[:,np.newaxis], 2, axis=1)
         knotvector_v = sv_knotvector.generate(1, 2, clamped=True)
         surface = SvNativeNurbsSurface(degree_u = self.degree, degree_v = 1,
                         knotvector_u = self.knotvector, knotvector_v = knotvector_v,
@@ -152,7 +152,7 @@ def interpolate_nurbs_curve(cls, degree, points, metric='DISTANCE', tknots=None)
         tknots = Spline.create_knots(points, metric=metric) # In 3D or in 4D, in general?
     knotvector = sv_knotvector.from_tknots(degree, tknots)
     functions = SvNurbsBasisFunctions(knotvector)
-    coeffs_by_row = [functions.function(idx, degree)(tknots) for idx in range(n)]
+    coeffs_by_row = functions.precompute(degree, 0, tknots)[0]
     A = np.zeros((ndim*n, ndim*n))
     for equation_idx, t in enumerate(tknots):
         for unknown_idx in range(n):
@@ -5,11 +5,15 @@
 # SPDX-License-Identifier: GPL3
 # License-Filename: LICENSE
 
+from functools import lru_cache
 import numpy as np
 
 from sverchok.utils.math import binomial
 from sverchok.utils.curve import knotvector as sv_knotvector
-from sverchok.dependencies import geomdl
+from sverchok.dependencies import geomdl, numba
+
+if numba is not None:
+    from numba import njit, prange
 
 class SvNurbsMaths(object):
     """
@@ -72,10 +76,8 @@ class SvNurbsMaths(object):
 def nurbs_divide(numerator, denominator):
     if denominator.ndim != 2:
         denominator = denominator[np.newaxis].T
-    good = (denominator != 0)
-    good_num = good.flatten()
     result = np.zeros_like(numerator)
-    result[good_num] = numerator[good_num] / denominator[good][np.newaxis].T
+    np.divide(numerator, denominator, out=result, where=(denominator != 0))
     return result
 
 def elevate_bezier_degree(self_degree, control_points, delta=1):
@@ -112,108 +114,428 @@ def from_homogenous(control_points):
     else:
         raise Exception(f"control_points have ndim={control_points.ndim}, supported are only 2 and 3")
 
+if numba is not None:
+    @njit(cache=True, parallel=True, fastmath=True)
+    def _deboor_general(padded, first_span, last_span, p, ts, deriv_order, out_N, out_span):
+        """
+        Numba-compiled version of SvNurbsBasisFunctions._deboor(). Calculates
+        basis functions of degree p which are non-zero at points ts, together
+        with their derivatives up to deriv_order. See "The NURBS Book"
+        (2nd edition), algorithms A2.2 and A2.3.
+
+        Inputs: padded, first_span and last_span are the tables from
+        SvNurbsBasisFunctions._get_tables(); ts is float64 array; p and
+        deriv_order are ints. Results are written into out_N (float64 array of shape
+        (deriv_order+1, n, p+1)) and out_span (int64 array of shape (n,)).
+        """
+        for i in prange(len(ts)):
+            t = ts[i]
+            span = np.searchsorted(padded, t, side='right') - 1
+            span = min(max(span, first_span), last_span)
+            out_span[i] = span - p
+            out_N[:, i, :] = 0.0
+            if t < padded[0] or t > padded[-1]:
+                continue
+
+            ndu = np.empty((p+1, p+1))
+            left = np.empty((p+1,))
+            right = np.empty((p+1,))
+            ndu[0, 0] = 1.0
+            for j in range(1, p+1):
+                left[j] = t - padded[span+1-j]
+                right[j] = padded[span+j] - t
+                saved = 0.0
+                for r in range(j):
+                    ndu[j, r] = right[r+1] + left[j-r]
+                    temp = ndu[r, j-1] / ndu[j, r]
+                    ndu[r, j] = saved + right[r+1] * temp
+                    saved = left[j-r] * temp
+                ndu[j, j] = saved
+
+            for r in range(p+1):
+                out_N[0, i, r] = ndu[r, p]
+
+            max_order = min(deriv_order, p)
+            a = np.empty((2, p+1))
+            for r in range(p+1):
+                s1, s2 = 0, 1
+                a[0, 0] = 1.0
+                coeff = 1.0
+                for k in range(1, max_order+1):
+                    coeff *= p - k + 1
+                    d = 0.0
+                    rk, pk = r-k, p-k
+                    if r >= k:
+                        a[s2, 0] = a[s1, 0] / ndu[pk+1, rk]
+                        d = a[s2, 0] * ndu[rk, pk]
+                    j1 = 1 if rk >= -1 else -rk
+                    j2 = k-1 if r-1 <= pk else p-r
+                    for j in range(j1, j2+1):
+                        a[s2, j] = (a[s1, j] - a[s1, j-1]) / ndu[pk+1, rk+j]
+                        d += a[s2, j] * ndu[rk+j, pk]
+                    if r <= pk:
+                        a[s2, k] = - a[s1, k-1] / ndu[pk+1, r]
+                        d += a[s2, k] * ndu[r, pk]
+                    out_N[k, i, r] = coeff * d
+                    s1, s2 = s2, s1
+
+    @njit(cache=True, parallel=True, fastmath=True)
+    def _deboor_p2(padded, first_span, last_span, p, ts, deriv_order, out_N, out_span):
+        """
+        Version of _deboor_general() specialized for p == 2, with
+        the triangular scheme unrolled.
+        Derivatives are calculated as
+            N^(k) = p!/(p-k)! * D_p ... D_(p-k+1) N_(p-k),
+        where N_q are values of basis functions of degree q, and
+            D_q(T)[r] = T[r-1] / (u[i+q] - u[i]) - T[r] / (u[i+q+1] - u[i+1]), i = span-q+r.
+        """
+        for i in prange(len(ts)):
+            t = ts[i]
+            span = np.searchsorted(padded, t, side='right') - 1
+            span = min(max(span, first_span), last_span)
+            out_span[i] = span - 2
+            out_N[:, i, :] = 0.0
+            if t < padded[0] or t > padded[-1]:
+                continue
+
+            left1 = t - padded[span]
+            left2 = t - padded[span-1]
+            right1 = padded[span+1] - t
+            right2 = padded[span+2] - t
+            inv10 = 1.0 / (right1 + left1)
+            inv20 = 1.0 / (right1 + left2)
+            inv21 = 1.0 / (right2 + left1)
+
+            n10 = right1 * inv10
+            n11 = left1 * inv10
+
+            temp = n10 * inv20
+            out_N[0, i, 0] = right1 * temp
+            saved = left2 * temp
+            temp = n11 * inv21
+            out_N[0, i, 1] = saved + right2 * temp
+            out_N[0, i, 2] = left1 * temp
+
+            if deriv_order >= 1:
+                a = n10 * inv20
+                b = n11 * inv21
+                out_N[1, i, 0] = - 2.0 * a
+                out_N[1, i, 1] = 2.0 * (a - b)
+                out_N[1, i, 2] = 2.0 * b
+            if deriv_order >= 2:
+                a = inv10 * inv20
+                b = inv10 * inv21
+                out_N[2, i, 0] = 2.0 * a
+                out_N[2, i, 1] = - 2.0 * (a + b)
+                out_N[2, i, 2] = 2.0 * b
+
+    @njit(cache=True, parallel=True, fastmath=True)
+    def _deboor_p3(padded, first_span, last_span, p, ts, deriv_order, out_N, out_span):
+        """
+        Version of _deboor_general() specialized for p == 3, with
+        the triangular scheme unrolled. See _deboor_p2() for derivatives formula.
+        """
+        for i in prange(len(ts)):
+            t = ts[i]
+            span = np.searchsorted(padded, t, side='right') - 1
+            span = min(max(span, first_span), last_span)
+            out_span[i] = span - 3
+            out_N[:, i, :] = 0.0
+            if t < padded[0] or t > padded[-1]:
+                continue
+
+            left1 = t - padded[span]
+            left2 = t - padded[span-1]
+            left3 = t - padded[span-2]
+            right1 = padded[span+1] - t
+            right2 = padded[span+2] - t
+            right3 = padded[span+3] - t
+            inv10 = 1.0 / (right1 + left1)
+            inv20 = 1.0 / (right1 + left2)
+            inv21 = 1.0 / (right2 + left1)
+            inv30 = 1.0 / (right1 + left3)
+            inv31 = 1.0 / (right2 + left2)
+            inv32 = 1.0 / (right3 + left1)
+
+            n10 = right1 * inv10
+            n11 = left1 * inv10
+
+            temp = n10 * inv20
+            n20 = right1 * temp
+            saved = left2 * temp
+            temp = n11 * inv21
+            n21 = saved + right2 * temp
+            n22 = left1 * temp
+
+            temp = n20 * inv30
+            out_N[0, i, 0] = right1 * temp
+            saved = left3 * temp
+            temp = n21 * inv31
+            out_N[0, i, 1] = saved + right2 * temp
+            saved = left2 * temp
+            temp = n22 * inv32
+            out_N[0, i, 2] = saved + right3 * temp
+            out_N[0, i, 3] = left1 * temp
+
+            if deriv_order >= 1:
+                a = n20 * inv30
+                b = n21 * inv31
+                c = n22 * inv32
+                out_N[1, i, 0] = - 3.0 * a
+                out_N[1, i, 1] = 3.0 * (a - b)
+                out_N[1, i, 2] = 3.0 * (b - c)
+                out_N[1, i, 3] = 3.0 * c
+            if deriv_order >= 2:
+                # D_2 N_1
+                e0 = - n10 * inv20
+                e1 = n10 * inv20 - n11 * inv21
+                e2 = n11 * inv21
+                a = e0 * inv30
+                b = e1 * inv31
+                c = e2 * inv32
+                out_N[2, i, 0] = - 6.0 * a
+                out_N[2, i, 1] = 6.0 * (a - b)
+                out_N[2, i, 2] = 6.0 * (b - c)
+                out_N[2, i, 3] = 6.0 * c
+            if deriv_order >= 3:
+                # D_2 D_1 N_0
+                e0 = inv10 * inv20
+                e1 = - inv10 * (inv20 + inv21)
+                e2 = inv10 * inv21
+                a = e0 * inv30
+                b = e1 * inv31
+                c = e2 * inv32
+                out_N[3, i, 0] = - 6.0 * a
+                out_N[3, i, 1] = 6.0 * (a - b)
+                out_N[3, i, 2] = 6.0 * (b - c)
+                out_N[3, i, 3] = 6.0 * c
+
+    _deboor_kernels = {2: _deboor_p2, 3: _deboor_p3}
+
+    def get_deboor_kernel(degree):
+        """
+        Get Numba-compiled de Boor kernel for the specified degree.
+        Returns None if Numba is not available.
+        """
+        return _deboor_kernels.get(degree, _deboor_general)
+else:
+    def get_deboor_kernel(degree):
+        return None
+
+@lru_cache(maxsize=128)
+def _get_basis_functions(knotvector_bytes, degree):
+    return SvNurbsBasisFunctions(np.frombuffer(knotvector_bytes), degree)
+
 class SvNurbsBasisFunctions(object):
-    def __init__(self, knotvector):
-        self.knotvector = np.array(knotvector)
-        self._cache = dict()
+    def __init__(self, knotvector, degree=None):
+        self.knotvector = np.array(knotvector, dtype=np.float64)
+        self._tables = dict()
+        self._deriv_table = None
+        if degree is not None:
+            self._get_tables(degree)
 
-    def function(self, i, p, reset_cache=True):
-        if reset_cache:
-            self._cache = dict()
-        def calc(us):
-            value = self._cache.get((i,p, 0))
-            if value is not None:
-                return value
+    @staticmethod
+    def get(knotvector, degree):
+        """
+        Get an instance of SvNurbsBasisFunctions for the specified knotvector,
+        with tables for the specified degree precomputed. Instances are cached,
+        so curves with the same knotvector share them.
+        """
+        knotvector = np.asarray(knotvector, dtype=np.float64)
+        return _get_basis_functions(knotvector.tobytes(), degree)
 
+    def _get_tables(self, p):
+        """
+        Get tables which depend only on knotvector and degree:
+            * knotvector padded with p additional copies of boundary knots,
+              so that the triangular scheme works for unclamped knotvectors too;
+            * indexes of first and last non-empty knot spans of padded knotvector;
+            * inverted knot differences: inv_diffs[s, j, r] = 1.0 / (u[s+r+1] - u[s+1-j+r])
+              for r < j, where u is padded knotvector and s is knot span index.
+        Numba kernels use the first three tables; inv_diffs is used by _deboor().
+        """
+        tables = self._tables.get(p)
+        if tables is None:
             u = self.knotvector
-            if p <= 0:
-                if i < 0 or i >= len(u):
-
-                    value = np.zeros_like(us)
-                    self._cache[(i,p,0)] = value
-                    return value
-                        
-                else:
-
-                    if i+1 >= len(u):
-                        u_next = u[-1]
-                        is_last = True
-                    else:
-                        u_next = u[i+1]
-                        is_last = u_next >= u[-1]
-                    if is_last:
-                        c2 = us <= u_next
-                    else:
-                        c2 = us < u_next
-                    condition = np.logical_and(u[i] <= us, c2)
-                    value = np.where(condition, 1.0, 0.0)
-                    self._cache[(i,p,0)] = value
-                    return value
-
-            else:
-                denom1 = (u[i+p] - u[i])
-                denom2 = (u[i+p+1] - u[i+1])
-
-                if denom1 != 0:
-                    n1 = self.function(i, p-1, reset_cache=False)(us)
-                if denom2 != 0:
-                    n2 = self.function(i+1, p-1, reset_cache=False)(us)
-
-                if denom1 == 0 and denom2 == 0:
-                    value = np.zeros_like(us)
-                    self._cache[(i,p,0)] = value
-                    return value
-                elif denom1 == 0 and denom2 != 0:
-                    c2 = (u[i+p+1] - us) / denom2
-                    value = c2 * n2
-                    self._cache[(i,p,0)] = value
-                    return value
-                elif denom1 != 0 and denom2 == 0:
-                    c1 = (us - u[i]) / denom1
-                    value = c1 * n1
-                    self._cache[(i,p,0)] = value
-                    return value
-                else: # denom1 != 0 and denom2 != 0
-                    c1 = (us - u[i]) / denom1
-                    c2 = (u[i+p+1] - us) / denom2
-                    value = c1 * n1 + c2 * n2
-                    self._cache[(i,p,0)] = value
-                    return value
-        return calc
+            padded = np.concatenate((np.full(p, u[0]), u, np.full(p, u[-1])))
+            first_span = np.searchsorted(padded, u[0], side='right') - 1
+            last_span = np.searchsorted(padded, u[-1], side='left') - 1
 
-    def derivative(self, i, p, k, reset_cache=True):
-        if reset_cache:
-            self._cache = dict()
+            s = np.arange(last_span+1)[:, np.newaxis, np.newaxis]
+            j = np.arange(p+1)[np.newaxis, :, np.newaxis]
+            r = np.arange(p+1)[np.newaxis, np.newaxis, :]
+            good = np.logical_and(r < j, s >= first_span)
+            high = np.clip(s + r + 1, 0, len(padded)-1)
+            low = np.clip(s + 1 - j + r, 0, len(padded)-1)
+            diffs = padded[high] - padded[low] # (last_span+1, p+1, p+1)
+            # zero-length knot spans are never used
+            good = np.logical_and(good, diffs != 0)
+            inv_diffs = np.zeros(diffs.shape)
+            inv_diffs[good] = 1.0 / diffs[good]
 
-        if k == 0:
-            return self.function(i, p, reset_cache=False)
+            tables = padded, first_span, last_span, inv_diffs
+            self._tables[p] = tables
+        return tables
 
-        def calc(us):
-            value = self._cache.get((i, p, k))
-            if value is not None:
-                return value
-            
-            n1 = self.derivative(i, p-1, k-1, reset_cache=False)(us)
-            n2 = self.derivative(i+1, p-1, k-1, reset_cache=False)(us)
-            u = self.knotvector
+    def _deboor(self, p, ts, deriv_order=0):
+        """
+        Calculate values of basis functions of degree p, which are non-zero
+        at points ts, together with their derivatives up to deriv_order.
+        See "The NURBS Book" (2nd edition), algorithms A2.2 and A2.3.
+
+        Returns: tuple:
+            * ders: np.array of shape (deriv_order+1, n, p+1); ders[k, i, r] is
+              k-th derivative of basis function number span[i]-p+r at ts[i];
+            * span: np.array of shape (n,), indexes of knot spans which contain ts.
+        """
+        u = self.knotvector
+        ts = np.asarray(ts, dtype=np.float64)
+        n = len(ts)
+        padded, first_span, last_span, inv_diffs = self._get_tables(p)
+        span = np.searchsorted(padded, ts, side='right') - 1
+        span = np.clip(span, first_span, last_span)
+        idx = span[np.newaxis].T # (n, 1)
+        us = ts[np.newaxis].T # (n, 1)
+
+        # ndu[:, r, j] for r <= j: values of basis functions of degree j;
+        # ndu[:, j, r] for r < j: inverted knot differences.
+        ndu = inv_diffs[span] # (n, p+1, p+1)
+        ndu[:, 0, 0] = 1.0
+        for j in range(1, p+1):
+            rs = np.arange(j)
+            right = padded[idx + 1 + rs] - us # (n, j)
+            left = us - padded[idx + 1 - j + rs] # (n, j)
+            temp = ndu[:, :j, j-1] * ndu[:, j, :j]
+            ndu[:, :j, j] = right * temp
+            ndu[:, 1:j+1, j] += left * temp
+
+        ders = np.zeros((deriv_order+1, n, p+1))
+        ders[0] = ndu[:, :, p]
+        max_order = min(deriv_order, p)
+        for r in range(p+1):
+            a = np.zeros((2, n, p+1))
+            a[0, :, 0] = 1.0
+            s1, s2 = 0, 1
+            for k in range(1, max_order+1):
+                d = np.zeros((n,))
+                rk, pk = r-k, p-k
+                if r >= k:
+                    a[s2, :, 0] = a[s1, :, 0] * ndu[:, pk+1, rk]
+                    d = a[s2, :, 0] * ndu[:, rk, pk]
+                j1 = 1 if rk >= -1 else -rk
+                j2 = k-1 if r-1 <= pk else p-r
+                if j2 >= j1:
+                    a[s2, :, j1:j2+1] = (a[s1, :, j1:j2+1] - a[s1, :, j1-1:j2]) * ndu[:, pk+1, rk+j1:rk+j2+1]
+                    d = d + (a[s2, :, j1:j2+1] * ndu[:, rk+j1:rk+j2+1, pk]).sum(axis=1)
+                if r <= pk:
+                    a[s2, :, k] = - a[s1, :, k-1] * ndu[:, pk+1, r]
+                    d = d + a[s2, :, k] * ndu[:, r, pk]
+                ders[k, :, r] = d
+                s1, s2 = s2, s1
+
+        coeff = p
+        for k in range(1, max_order+1):
+            ders[k] *= coeff
+            coeff *= p - k
+
+        outside = np.logical_or(ts < u[0], ts > u[-1])
+        ders[:, outside, :] = 0.0
+        return ders, span - p
+
+    def _evaluate_local(self, p, ts, deriv_order=0):
+        ts = np.ascontiguousarray(ts, dtype=np.float64)
+        kernel = get_deboor_kernel(p)
+        if kernel is None:
+            return self._deboor(p, ts, deriv_order)
+        padded, first_span, last_span, _ = self._get_tables(p)
+        n = len(ts)
+        ders = np.empty((deriv_order+1, n, p+1))
+        span = np.empty((n,), dtype=np.int64)
+        kernel(padded, first_span, last_span, p, ts, deriv_order, ders, span)
+        return ders, span
 
-            denom1 = u[i+p] - u[i]
-            denom2 = u[i+p+1] - u[i+1]
+    def derivatives_all_local(self, p, ts, max_order):
+        """
+        Calculate values of basis functions of degree p, which are non-zero
+        at points ts, together with their derivatives of orders 1..max_order.
 
-            if denom1 == 0:
-                s1 = np.zeros_like(us)
-            else:
-                s1 = n1 / denom1
+        Returns: tuple:
+            * ders: np.array of shape (max_order+1, n, p+1); ders[k, i, r] is
+              k-th derivative of basis function number span[i]-p+r at ts[i].
+              Values of functions with indexes out of [0; k) range are zeros.
+            * span: np.array of shape (n,).
+        """
+        k = len(self.knotvector) - p - 1
+        ders, span = self._evaluate_local(p, ts, max_order)
+        cols = span[np.newaxis].T + np.arange(-p, 1) # (n, p+1)
+        ders[:, np.logical_or(cols < 0, cols >= k)] = 0.0
+        return ders, span
 
-            if denom2 == 0:
-                s2 = np.zeros_like(us)
-            else:
-                s2 = n2 / denom2
+    def evaluate_all_local(self, p, ts, deriv_order=0):
+        """
+        Calculate values of basis functions of degree p (or their derivatives
+        of order deriv_order), which are non-zero at points ts.
 
-            value = p*(s1 - s2)
-            self._cache[(i,p,k)] = value
-            return value
-        
+        Returns: tuple:
+            * ns: np.array of shape (n, p+1); ns[i, r] is the value of basis
+              function number span[i]-p+r at ts[i]. Values of functions with
+              indexes out of [0; k) range are zeros.
+            * span: np.array of shape (n,).
+        """
+        ders, span = self.derivatives_all_local(p, ts, deriv_order)
+        return ders[deriv_order], span
+
+    def _evaluate_dense(self, p, ts, max_order):
+        ts = np.asarray(ts)
+        n = len(ts)
+        k = len(self.knotvector) - p - 1
+        ders, span = self._evaluate_local(p, ts, max_order)
+        cols = span[np.newaxis].T + np.arange(-p, 1) # (n, p+1)
+        rows = np.broadcast_to(np.arange(n)[np.newaxis].T, cols.shape)
+        good = np.logical_and(cols >= 0, cols < k)
+        result = np.zeros((max_order+1, n, k))
+        result[:, rows[good], cols[good]] = ders[:, good]
+        return np.transpose(result, axes=(0,2,1))
+
+    def evaluate_all(self, p, ts, deriv_order=0):
+        """
+        Calculate values of all basis functions of degree p (or their
+        derivatives of order deriv_order) at points ts.
+
+        Returns: np.array of shape (k, n), where k is the number of basis
+        functions and n is the number of points.
+        """
+        return self._evaluate_dense(p, ts, deriv_order)[deriv_order]
+
+    def precompute(self, p, max_deriv, ts):
+        """
+        Calculate values of all basis functions of degree p, together with
+        their derivatives of orders 1..max_deriv, at points ts.
+        The last calculated table is remembered, so that consecutive calls
+        with the same arguments (for example, calling function(i, p) for
+        each i) do not calculate it again.
+
+        Returns: read-only np.array of shape (max_deriv+1, k, n); table[d, i]
+        are values of d-th derivative of i-th basis function at ts.
+        """
+        ts = np.ascontiguousarray(ts, dtype=np.float64)
+        key = (p, max_deriv, ts.tobytes())
+        cached = self._deriv_table
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        table = self._evaluate_dense(p, ts, max_deriv)
+        table.flags.writeable = False
+        self._deriv_table = (key, table)
+        return table
+
+    def function(self, i, p):
+        def calc(us):
+            return self.precompute(p, 0, us)[0, i].copy()
+        return calc
+
+    def derivative(self, i, p, k):
+        def calc(us):
+            return self.precompute(p, k, us)[k, i].copy()
         return calc
 
 class CantInsertKnotException(Exception):
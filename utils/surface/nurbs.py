@@ -586,8 +586,8 @@ class SvNativeNurbsSurface(SvNurbsSurface):
             w_ku, w_kv = self.weights.shape
             if c_ku != w_ku or c_kv != w_kv:
                 raise Exception(f"Shape of control_points ({c_ku}, {c_kv}) does not match to shape of weights ({w_ku}, {w_kv})")
-        self.basis_u = SvNurbsBasisFunctions(knotvector_u)
-        self.basis_v = SvNurbsBasisFunctions(knotvector_v)
+        self.basis_u = SvNurbsBasisFunctions.get(self.knotvector_u, degree_u)
+        self.basis_v = SvNurbsBasisFunctions.get(self.knotvector_v, degree_v)
         self.u_bounds = (self.knotvector_u.min(), self.knotvector_u.max())
         self.v_bounds = (self.knotvector_v.min(), self.knotvector_v.max())
         self.normal_delta = 0.0001
@@ -809,19 +809,19 @@ class SvNativeNurbsSurface(SvNurbsSurface):
         pu = self.degree_u
         pv = self.degree_v
         ku, kv, _ = self.control_points.shape
-        nsu = np.array([self.basis_u.derivative(i, pu, deriv_order_u)(us) for i in range(ku)]) # (ku, n)
-        nsv = np.array([self.basis_v.derivative(i, pv, deriv_order_v)(vs) for i in range(kv)]) # (kv, n)
-        nsu = np.transpose(nsu[np.newaxis], axes=(1,0,2)) # (ku, 1, n)
-        nsv = nsv[np.newaxis] # (1, kv, n)
-        ns = nsu * nsv # (ku, kv, n)
-        weights = np.transpose(self.weights[np.newaxis], axes=(1,2,0)) # (ku, kv, 1)
-        coeffs = ns * weights # (ku, kv, n)
-        coeffs = np.transpose(coeffs[np.newaxis], axes=(3,1,2,0)) # (n,ku,kv,1)
-        controls = self.control_points # (ku,kv,3)
-
-        numerator = coeffs * controls # (n,ku,kv,3)
-        numerator = numerator.sum(axis=1).sum(axis=1) # (n,3)
-        denominator = coeffs.sum(axis=1).sum(axis=1)
+        # only (pu+1)*(pv+1) basis functions products are non-zero at each point
+        nsu, span_u = self.basis_u.evaluate_all_local(pu, us, deriv_order_u) # (n, pu+1), (n,)
+        nsv, span_v = self.basis_v.evaluate_all_local(pv, vs, deriv_order_v) # (n, pv+1), (n,)
+        idxs_u = np.clip(span_u[np.newaxis].T + np.arange(-pu, 1), 0, ku-1) # (n, pu+1)
+        idxs_v = np.clip(span_v[np.newaxis].T + np.arange(-pv, 1), 0, kv-1) # (n, pv+1)
+        idxs_u = idxs_u[:, :, np.newaxis] # (n, pu+1, 1)
+        idxs_v = idxs_v[:, np.newaxis, :] # (n, 1, pv+1)
+        ns = nsu[:, :, np.newaxis] * nsv[:, np.newaxis, :] # (n, pu+1, pv+1)
+        coeffs = ns * self.weights[idxs_u, idxs_v] # (n, pu+1, pv+1)
+        controls = self.control_points[idxs_u, idxs_v] # (n, pu+1, pv+1, 3)
+
+        numerator = np.einsum('nij,nijd->nd', coeffs, controls) # (n,3)
+        denominator = coeffs.sum(axis=(1,2))[np.newaxis].T # (n,1)
 
         return numerator, denominator
 